@@ -10,13 +10,22 @@ if __name__ == "__main__":
     input_path = sys.argv[1]
     output_path = "tests/data/model_output.csv"
 
-    df = pd.read_csv(input_path)
     model = SentimentModel()
 
-    outputs = []
-    for text in df["text"]:
-        result = model.analyze(text)
-        outputs.append({"text": text, "label": result["label"], "score": result["score"]})
-
-    pd.DataFrame(outputs).to_csv(output_path, index=False)
+    # Stream the CSV in chunks so peak memory stays O(chunk) regardless of
+    # input size, appending each scored chunk to the output as we go. Arrow
+    # string buffers keep the text column compact versus object dtype.
+    reader = pd.read_csv(
+        input_path, usecols=["text"], chunksize=4096, dtype_backend="pyarrow"
+    )
+    with open(output_path, "w", newline="") as f:
+        f.write("text,label,score\n")
+        for chunk in reader:
+            texts = chunk["text"].astype(str).tolist()
+            columns = model.analyze_batch_arrays(texts, batch_size=64)
+            pd.DataFrame({
+                "text": texts,
+                "label": columns["label"],
+                "score": columns["score"],
+            }).to_csv(f, header=False, index=False)
     print(f"Results saved to {output_path}")
\ No newline at end of file
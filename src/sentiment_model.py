@@ -1,8 +1,13 @@
 # src/sentiment_model.py
 
+import functools
 import logging
+import os
 import time
-from typing import Dict, Any
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import torch
 from transformers import pipeline
 
 # Configure logging with more detailed format
@@ -16,34 +21,275 @@ logger = logging.getLogger(__name__)
 # Add a counter to track model instances
 _model_instance_count = 0
 
+# Per-forward-pass token cap; bounds attention cost at O(_MAX_LENGTH^2)
+_MAX_LENGTH = 128
+
+
+def _postprocess(logits: np.ndarray):
+    """Vectorized argmax + top-class softmax over a (B, num_labels) array.
+
+    One numpy pass over the whole batch replaces a per-row Python loop of
+    max/exp/divide, so post-processing cost stays negligible next to the
+    forward pass even for large batches.
+
+    Returns:
+        tuple: (label indices as int array, top-class probabilities as
+            float32 array)
+    """
+    logits = np.asarray(logits, dtype=np.float32)
+
+    if logits.shape[1] == 2:
+        # Two-class special case: the winner's softmax probability equals
+        # sigmoid(|logit gap|), so skip the full softmax
+        diff = logits[:, 1] - logits[:, 0]
+        indices = (diff > 0).astype(np.int64)
+        scores = (1.0 / (1.0 + np.exp(-np.abs(diff)))).astype(np.float32)
+        return indices, scores
+
+    m = logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits - m)
+    probs = exp / exp.sum(axis=1, keepdims=True)
+    indices = probs.argmax(axis=1)
+    scores = probs[np.arange(len(indices)), indices]
+    return indices, scores
+
+
+def _default_dtype() -> "torch.dtype":
+    """Pick the cheapest dtype the current hardware can run well."""
+    if torch.cuda.is_available():
+        return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    torch.set_float32_matmul_precision("high")
+    try:
+        # BF16 only pays off on CPUs with native support (AVX-512-BF16 /
+        # ARM BF16); emulated BF16 is slower than plain FP32
+        if torch.cpu._is_avx512_bf16_supported():
+            return torch.bfloat16
+    except AttributeError:
+        pass
+    return torch.float32
+
+
+@functools.lru_cache(maxsize=4)
+def _load_pipeline(
+    model_name: str,
+    device: int,
+    dtype_str: str,
+    backend: str = "pt",
+    quantize: bool = False,
+    compile: bool = True,
+):
+    """Load a sentiment pipeline, shared process-wide.
+
+    The lru_cache means repeated SentimentModel constructions reuse one
+    ~250 MB model instead of hitting the disk/HF hub again. Every flag that
+    changes the loaded model (quantization, compilation) is part of the
+    cache key, so instances built with different constructor arguments never
+    share — or mutate — each other's pipeline.
+    """
+    if backend == "ort":
+        return _load_ort_pipeline(model_name)
+
+    pipe = pipeline(
+        "sentiment-analysis",
+        model=model_name,
+        device=device,
+        truncation=True,
+        max_length=_MAX_LENGTH,
+        padding=True,
+        use_fast=True,
+    )
+
+    # Bound attention cost at O(128^2) per forward pass; keep a sane ceiling
+    # on the tokenizer itself in case callers override max_length upward.
+    pipe.tokenizer.model_max_length = 512
+
+    # Inference only: drop autograd bookkeeping on every forward pass
+    pipe.model.eval()
+    for p in pipe.model.parameters():
+        p.requires_grad_(False)
+
+    try:
+        pipe.model = pipe.model.to(dtype=getattr(torch, dtype_str))
+        logger.debug("Model cast to %s", dtype_str)
+    except Exception as e:
+        logger.warning(
+            "Reduced-precision inference unavailable, staying in FP32: %s", str(e)
+        )
+
+    try:
+        from optimum.bettertransformer import BetterTransformer
+
+        pipe.model = BetterTransformer.transform(pipe.model)
+        logger.debug("Enabled BetterTransformer fused kernels")
+    except Exception as e:
+        logger.debug("BetterTransformer not applied: %s", str(e))
+
+    if quantize and device == -1:
+        try:
+            pipe.model = torch.quantization.quantize_dynamic(
+                pipe.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info("Applied dynamic int8 quantization")
+        except Exception as e:
+            logger.warning("Dynamic quantization unavailable: %s", str(e))
+
+    if compile:
+        eager_model = pipe.model
+        try:
+            pipe.model = torch.compile(
+                eager_model, mode="reduce-overhead", fullgraph=False
+            )
+            # Warm up so the first real analyze() doesn't pay compile cost.
+            # Compilation failures typically surface here, on the first
+            # call, rather than in torch.compile itself.
+            with torch.inference_mode():
+                pipe("warmup", truncation=True)
+            logger.debug("Model compiled with torch.compile")
+        except Exception as e:
+            pipe.model = eager_model
+            logger.warning(
+                "torch.compile unavailable, falling back to eager mode: %s", str(e)
+            )
+
+    return pipe
+
+
+def _load_ort_pipeline(model_name: str):
+    """Build a pipeline backed by ONNX Runtime's graph-optimized kernels.
+
+    The exported ONNX model is cached under ~/.cache/sentiment-onnx so only
+    the first instantiation per model pays the export cost.
+    """
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    export_dir = os.path.join(
+        os.path.expanduser("~"), ".cache", "sentiment-onnx", model_name.replace("/", "--")
+    )
+    if os.path.isdir(export_dir):
+        model = ORTModelForSequenceClassification.from_pretrained(export_dir)
+    else:
+        model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        model.save_pretrained(export_dir)
+
+    return pipeline(
+        "sentiment-analysis",
+        model=model,
+        tokenizer=AutoTokenizer.from_pretrained(model_name, use_fast=True),
+        truncation=True,
+        padding=True,
+    )
+
+
 class SentimentModel:
     """Wrapper around Hugging Face sentiment-analysis pipeline."""
 
-    def __init__(self, model_name: str = "distilbert-base-uncased-finetuned-sst-2-english"):
+    def __init__(
+        self,
+        model_name: str = "distilbert-base-uncased-finetuned-sst-2-english",
+        compile: bool = True,
+        dtype: "torch.dtype" = None,
+        cache: bool = True,
+        backend: str = "pt",
+        quantize: bool = False,
+    ):
         """Initialize the sentiment analysis model.
-        
+
         Args:
             model_name: Name of the pre-trained model to use for sentiment analysis.
+            compile: Whether to wrap the model with torch.compile for fused
+                kernels. Disable for mocked pipelines in tests or on platforms
+                where compilation is unsupported.
+            dtype: Optional torch dtype override for inference. Defaults to
+                BF16 where supported (FP16 on older GPUs), falling back to
+                FP32 when reduced precision is unavailable.
+            cache: Whether to memoize analyze() results per input text, so
+                repeated inputs skip the forward pass. Disable for tests that
+                exercise per-call behavior.
+            backend: "pt" for the PyTorch pipeline (default) or "ort" for
+                ONNX Runtime via optimum, which is typically 2-4x faster for
+                CPU inference on short sequences.
+            quantize: Whether to apply dynamic int8 quantization to the
+                Linear layers for CPU inference. Ignored on GPU, where
+                dynamic quantization isn't supported.
         """
         global _model_instance_count
         _model_instance_count += 1
         self.instance_id = _model_instance_count
+        # Cached so the hot inference path skips debug-only work entirely
+        self._debug = logger.isEnabledFor(logging.DEBUG)
         
         start_time = time.time()
-        logger.info(f"[{self.instance_id}] Initializing SentimentModel with {model_name}")
+        logger.info("[%s] Initializing SentimentModel with %s", self.instance_id, model_name)
         
         self.model_name = model_name
-        logger.debug(f"[{self.instance_id}] Loading model pipeline...")
+        logger.debug("[%s] Loading model pipeline...", self.instance_id)
         
+        device = 0 if torch.cuda.is_available() else -1
+        if dtype is None:
+            dtype = _default_dtype()
+
         try:
-            self.pipeline = pipeline("sentiment-analysis", model=model_name)
+            self.pipeline = _load_pipeline(
+                model_name,
+                device,
+                str(dtype).replace("torch.", ""),
+                backend,
+                quantize and backend == "pt",
+                compile and backend == "pt",
+            )
+            self.tokenizer = getattr(self.pipeline, "tokenizer", None)
             load_time = time.time() - start_time
-            logger.info(f"[{self.instance_id}] Successfully loaded model: {model_name} in {load_time:.2f}s")
-            logger.debug(f"[{self.instance_id}] Model instance details: {self}")
+            logger.info(
+                "[%s] Successfully loaded model: %s in %.2fs",
+                self.instance_id, model_name, load_time,
+            )
+
+            # Freeze a device-specialized forward for the token-level path so
+            # per-call dispatch carries no device branches. On CUDA,
+            # torch.compile's reduce-overhead mode already captures CUDA
+            # graphs; on eager CPU we additionally try a traced,
+            # inference-optimized graph.
+            self._fwd = getattr(self.pipeline, "model", None)
+            if backend == "pt" and device == -1 and not compile and self.tokenizer is not None:
+                try:
+                    example = self.tokenizer("warmup", return_tensors="pt")
+                    traced = torch.jit.trace(
+                        self.pipeline.model,
+                        (example["input_ids"], example["attention_mask"]),
+                        strict=False,
+                    )
+                    traced = torch.jit.optimize_for_inference(traced)
+                    # Tracing can bake shape-dependent values from the example
+                    # input, so check the graph on a different sequence length
+                    # against the eager module before adopting it.
+                    check = self.tokenizer(
+                        "a longer sentence used to verify the traced graph",
+                        return_tensors="pt",
+                    )
+                    with torch.inference_mode():
+                        traced_out = traced(check["input_ids"], check["attention_mask"])
+                        eager_out = self.pipeline.model(**check)
+                    traced_logits = (
+                        traced_out.logits
+                        if hasattr(traced_out, "logits")
+                        else traced_out["logits"]
+                    )
+                    if not torch.allclose(traced_logits, eager_out.logits, atol=1e-4):
+                        raise RuntimeError("traced logits diverge from eager logits")
+                    self._fwd = traced
+                    logger.debug("[%s] Using JIT-traced CPU forward", self.instance_id)
+                except Exception as e:
+                    logger.debug("[%s] JIT trace not applied: %s", self.instance_id, str(e))
         except Exception as e:
-            logger.error(f"[{self.instance_id}] Failed to load model: {str(e)}")
+            logger.error("[%s] Failed to load model: %s", self.instance_id, str(e))
             raise
 
+        if cache:
+            self._analyze_cached = functools.lru_cache(maxsize=1024)(self._analyze_raw)
+        else:
+            self._analyze_cached = self._analyze_raw
+
     def analyze(self, text: str) -> Dict[str, Any]:
         """
         Analyze the sentiment of a given text.
@@ -57,31 +303,211 @@ class SentimentModel:
         Raises:
             ValueError: If input is empty or not a string
         """
-        if not text or not isinstance(text, str):
+        # Validate before the cache lookup: unhashable inputs (e.g. a list
+        # passed where analyze_batch was meant) would otherwise raise
+        # TypeError from lru_cache instead of the documented ValueError
+        if not isinstance(text, str) or not text:
             error_msg = "Input text must be a non-empty string."
-            logger.error(f"[{getattr(self, 'instance_id', '?')}] {error_msg}")
+            logger.error("[%s] %s", self.instance_id, error_msg)
             raise ValueError(error_msg)
-        
-        # Truncate text for logging if too long
-        text_preview = text[:50] + ('...' if len(text) > 50 else '')
-        logger.debug(f"[{self.instance_id}] Analyzing text: '{text_preview}'")
-        
+        return dict(self._analyze_cached(text))
+
+    def _analyze_raw(self, text: str) -> Dict[str, Any]:
+        """Run a single uncached forward pass; analyze() memoizes this."""
+        return self.analyze_batch([text])[0]
+
+    def analyze_batch(
+        self, texts: Sequence[str], batch_size: int = 32, dedupe: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze the sentiment of a batch of texts in a single pipeline call.
+
+        Batching lets the underlying transformer run one padded forward pass
+        per `batch_size` inputs instead of one per text, which is dramatically
+        faster on multi-sample workloads. Inputs are sorted by token length
+        before batching so short texts aren't padded up to the longest one in
+        the batch, then results are returned in the original order.
+
+        Args:
+            texts: Sequence of input texts to analyze
+            batch_size: Number of texts fed to the model per forward pass
+            dedupe: Whether to collapse duplicate texts before inference and
+                scatter the shared result back, so repeated rows only cost
+                one forward pass
+
+        Returns:
+            list: One dict per input, each with 'label' (POSITIVE/NEGATIVE)
+                and 'score' (confidence between 0 and 1), in input order
+
+        Raises:
+            ValueError: If any input is empty or not a string
+        """
+        if not all(isinstance(t, str) and t for t in texts):
+            error_msg = "Input text must be a non-empty string."
+            logger.error("[%s] %s", getattr(self, 'instance_id', '?'), error_msg)
+            raise ValueError(error_msg)
+
+        texts = list(texts)
+        debug = self._debug
+        if debug:
+            logger.debug("[%s] Analyzing batch of %d texts", self.instance_id, len(texts))
+            start_time = time.perf_counter_ns()
+
         try:
-            start_time = time.time()
-            result = self.pipeline(text)[0]
-            process_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-            
-            logger.debug(
-                f"[{self.instance_id}] Analysis completed in {process_time:.2f}ms - "
-                f"Label: {result['label']}, Score: {result['score']:.4f}"
-            )
-            
-            return {"label": result["label"], "score": result["score"]}
-            
+            inverse = None
+            run_texts = texts
+            if dedupe:
+                uniq, inv = np.unique(np.array(texts, dtype=object), return_inverse=True)
+                if len(uniq) < len(texts):
+                    run_texts = list(uniq)
+                    inverse = inv
+
+            results = self._forward_texts(run_texts, batch_size)
+
+            if inverse is not None:
+                # Scatter each unique result back to every duplicate slot
+                results = [dict(results[i]) for i in inverse]
+
+            if debug:
+                logger.debug(
+                    "[%s] Batch analysis of %d texts completed in %.2fms",
+                    self.instance_id,
+                    len(texts),
+                    (time.perf_counter_ns() - start_time) / 1e6,
+                )
+
+            return [{"label": r["label"], "score": r["score"]} for r in results]
+
         except Exception as e:
-            logger.error(f"[{self.instance_id}] Error during analysis: {str(e)}")
+            logger.error("[%s] Error during analysis: %s", self.instance_id, str(e))
             raise
 
+    def analyze_batch_arrays(
+        self, texts: Sequence[str], batch_size: int = 32
+    ) -> Dict[str, np.ndarray]:
+        """
+        Column-oriented variant of analyze_batch.
+
+        Returns the labels and scores as two numpy arrays instead of one
+        dict per row, so callers building DataFrames (e.g. run_and_log.py)
+        avoid per-row dict allocation entirely.
+
+        Args:
+            texts: Sequence of input texts to analyze
+            batch_size: Number of texts fed to the model per forward pass
+
+        Returns:
+            dict: {"label": array of 'POSITIVE'/'NEGATIVE', "score": float32
+                array of confidences}, aligned with the input order
+        """
+        results = self.analyze_batch(texts, batch_size=batch_size)
+        # Let numpy infer the string width: a fixed-width dtype would
+        # silently truncate longer labels from non-default checkpoints
+        labels = np.array([r["label"] for r in results])
+        scores = np.empty(len(results), dtype=np.float32)
+        for i, r in enumerate(results):
+            scores[i] = r["score"]
+        return {"label": labels, "score": scores}
+
+    def analyze_tokens(self, encodings) -> List[Dict[str, Any]]:
+        """
+        Analyze pre-tokenized inputs, skipping the tokenizer entirely.
+
+        Useful when the same text is scored repeatedly: encode once via
+        `self.tokenizer(text, return_tensors="pt")` and reuse the encoding,
+        so the BPE work isn't redone on every call.
+
+        Args:
+            encodings: A tokenizer output (input_ids/attention_mask tensors)
+
+        Returns:
+            list: One dict per row with 'label' and 'score', as analyze_batch
+        """
+        if hasattr(encodings, "to"):
+            encodings = encodings.to(self.pipeline.device)
+
+        with torch.inference_mode():
+            output = self._fwd(**encodings)
+        logits = output.logits if hasattr(output, "logits") else output["logits"]
+
+        indices, scores = _postprocess(logits.float().cpu().numpy())
+        id2label = self.pipeline.model.config.id2label
+        return [
+            {"label": id2label[i], "score": s}
+            for i, s in zip(indices.tolist(), scores.tolist())
+        ]
+
+    def _forward_texts(self, texts: List[str], batch_size: int) -> List[Dict[str, Any]]:
+        """Run inference over texts in length-sorted micro-batches.
+
+        With a fast tokenizer the texts are encoded exactly once, without
+        tensors; the lengths of that encoding drive the sort, and each
+        micro-batch is padded from the cached ids via tokenizer.pad, so no
+        text is re-tokenized. Pipelines without a fast tokenizer (e.g. mocks
+        in the unit tests) fall back to the wrapped call.
+        """
+        try:
+            from transformers import PreTrainedTokenizerFast
+
+            fast = isinstance(self.tokenizer, PreTrainedTokenizerFast)
+        except ImportError:
+            fast = False
+
+        if fast:
+            enc = self.tokenizer(texts, truncation=True, max_length=_MAX_LENGTH)
+            keys = list(enc.keys())
+            lengths = np.array([len(ids) for ids in enc["input_ids"]])
+            order = np.argsort(lengths, kind="stable")
+            sorted_features = [{k: enc[k][i] for k in keys} for i in order]
+
+            sorted_results = []
+            id2label = self.pipeline.model.config.id2label
+            for start in range(0, len(sorted_features), batch_size):
+                batch = self.tokenizer.pad(
+                    sorted_features[start:start + batch_size],
+                    padding=True,
+                    return_tensors="pt",
+                )
+                if hasattr(batch, "to"):
+                    batch = batch.to(self.pipeline.device)
+                with torch.inference_mode():
+                    output = self._fwd(**batch)
+                logits = output.logits if hasattr(output, "logits") else output["logits"]
+                indices, scores = _postprocess(logits.float().cpu().numpy())
+                sorted_results.extend(
+                    {"label": id2label[i], "score": float(s)}
+                    for i, s in zip(indices.tolist(), scores.tolist())
+                )
+        else:
+            order = self._length_order(texts)
+            with torch.inference_mode():
+                sorted_results = self.pipeline(
+                    [texts[i] for i in order],
+                    batch_size=batch_size,
+                    padding="longest",
+                    truncation=True,
+                )
+
+        results = [None] * len(texts)
+        for dst, src in enumerate(order):
+            results[src] = sorted_results[dst]
+        return results
+
+    def _length_order(self, texts: List[str]) -> np.ndarray:
+        """Return indices that sort texts by token length, shortest first.
+
+        Falls back to character length when the tokenizer can't report token
+        counts (e.g. mocked pipelines in tests).
+        """
+        try:
+            lengths = self.tokenizer(texts, truncation=True, return_length=True)["length"]
+            lengths = np.asarray(lengths)
+            if lengths.shape != (len(texts),):
+                raise ValueError("tokenizer did not return one length per text")
+        except Exception:
+            lengths = np.array([len(t) for t in texts])
+        return np.argsort(lengths, kind="stable")
+
 
 if __name__ == "__main__":
     import sys
@@ -24,9 +24,9 @@ SAMPLE_TEXTS = [
 SAMPLE_LABELS = ["positive", "negative", "neutral", "positive", "negative"]
 
 @pytest.fixture(scope="module")
-def model():
-    """Fixture to load the sentiment analysis model."""
-    return SentimentModel()
+def model(sentiment_model):
+    """Alias for the shared session-scoped model fixture in conftest.py."""
+    return sentiment_model
 
 @pytest.fixture(scope="module")
 def test_dataset():
@@ -54,8 +54,8 @@ def test_data_validation(test_dataset):
 
 def test_model_performance(model, test_dataset):
     """Test model performance using various metrics."""
-    # Get predictions for the test data
-    predictions = [model.analyze(text)['label'] for text in SAMPLE_TEXTS * 10]
+    # Get predictions for the test data in one batched call
+    predictions = [r['label'] for r in model.analyze_batch(SAMPLE_TEXTS * 10)]
     
     # Create a copy of the test dataset with predictions
     dataset_with_preds = test_dataset.data.copy()
@@ -92,8 +92,9 @@ def test_data_drift(model, test_dataset):
     train_df = df.sample(frac=0.7, random_state=42)
     test_df = df.drop(train_df.index)
     
-    # Get predictions for the test set
-    test_df['predictions'] = test_df['text'].apply(lambda x: model.analyze(x)['label'])
+    # Get predictions for the test set in one batched call
+    preds = model.analyze_batch(test_df['text'].tolist())
+    test_df['predictions'] = [r['label'] for r in preds]
     
     # Create DeepChecks datasets
     train_ds = Dataset(train_df, label='label', features=['text'])
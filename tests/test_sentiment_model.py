@@ -4,14 +4,14 @@ from src.sentiment_model import SentimentModel
 
 @pytest.fixture
 def mock_pipeline():
-    with patch('transformers.pipeline') as mock_pipe:
-        mock_pipe.return_value = MagicMock()
-        yield mock_pipe.return_value
+    with patch('src.sentiment_model._load_pipeline') as mock_load:
+        mock_load.return_value = MagicMock()
+        yield mock_load.return_value
 
 @pytest.fixture
 def sentiment_model(mock_pipeline):
     # Configure the mock pipeline to return different results based on input
-    def mock_pipeline_func(texts):
+    def mock_pipeline_func(texts, **kwargs):
         results = []
         for text in texts:
             text_lower = text.lower()
@@ -24,7 +24,7 @@ def sentiment_model(mock_pipeline):
         return results
     
     mock_pipeline.side_effect = mock_pipeline_func
-    return SentimentModel()
+    return SentimentModel(compile=False)
 
 @pytest.mark.parametrize("text,expected_label", [
     ("I love this product", "POSITIVE"),
@@ -2,78 +2,46 @@
 Comprehensive tests for the SentimentModel using deep evaluation metrics.
 Includes unit tests, integration tests, and model behavior tests.
 """
-import pytest
 import logging
-import sys
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
-from src.sentiment_model import SentimentModel, logger as model_logger
 
-# Configure logging to show debug output for our tests
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stdout
-)
+import pytest
+import torch
+from src.sentiment_model import SentimentModel, logger as model_logger
 
-# Get the root logger
-logger = logging.getLogger()
+# No logging.basicConfig here: configuring logging at import time would pin
+# every logger's level for the whole session. Use caplog.set_level in tests
+# that need DEBUG records.
 
 # Create a test-specific logger
 test_logger = logging.getLogger('test_sentiment_model')
 
-# Test data
-POSITIVE_TEST_CASES = [
-    "I love this product! It's amazing!",
-    "This is absolutely fantastic!",
-    "Couldn't be happier with my purchase!",
-    "10/10 would recommend to anyone!",
-    "Exceeded all my expectations!"
-]
-
-NEGATIVE_TEST_CASES = [
-    "I hate this product! It's terrible!",
-    "This is absolutely awful!",
-    "Worst purchase I've ever made.",
-    "Would not recommend to my worst enemy.",
-    "Complete waste of money."
-]
-
-NEUTRAL_TEST_CASES = [
-    "This is a test.",
-    "The product is okay, I guess.",
-    "Not good, not bad.",
-    "It serves its purpose.",
-    "I have no strong feelings."
-]
-
-SHORT_INPUTS = [
-    ("Great!", "POSITIVE"),
-    ("Terrible!", "NEGATIVE"),
-    ("Meh", "NEGATIVE"),
-]
-
-# Model Fixture
-@pytest.fixture(scope="module")
-def sentiment_model() -> SentimentModel:
-    """Fixture that provides a SentimentModel instance.
-    
-    Uses module scope to ensure the model is loaded only once per test module.
-    """
-    test_logger.info("\n=== Setting up SentimentModel fixture (module scope) ===")
-    model = SentimentModel()
-    test_logger.info(f"=== Created model instance with ID: {model.instance_id} ===\n")
-    return model
+# Test data lives in conftest.py so the session-scoped predictions fixture
+# can batch-score the deduplicated union once for all modules
+from conftest import (
+    CONSISTENCY_PHRASES,
+    NEGATIVE_TEST_CASES,
+    NEUTRAL_TEST_CASES,
+    POSITIVE_TEST_CASES,
+    SHORT_INPUTS,
+)
+
+# The shared session-scoped `sentiment_model` fixture lives in conftest.py
 
 # Model Initialization Tests
-def test_model_initialization():
+def test_model_initialization(sentiment_model: SentimentModel):
     """Test that the model initializes correctly with all required attributes."""
     test_logger.info("\n=== Testing model initialization ===")
-    
+
     try:
-        # Create model instance using the fixture
-        model = SentimentModel()
-        
+        # Use the shared session fixture; constructing a fresh instance here
+        # would reload nothing thanks to the pipeline cache, but there's no
+        # need for a separate instance either
+        model = sentiment_model
+
         # Basic checks
         assert model is not None
         assert hasattr(model, 'analyze')
@@ -106,7 +74,6 @@ def test_model_initialization():
             raise
         
         test_logger.info("=== Model initialization test completed ===\n")
-        return model
     except Exception as e:
         test_logger.error(f"Model initialization test failed: {str(e)}")
         raise
@@ -115,9 +82,10 @@ def test_multiple_model_instances():
     """Test that multiple model instances work independently."""
     test_logger.info("\n=== Testing multiple model instances ===")
     
-    # Create multiple model instances
-    model1 = SentimentModel()
-    model2 = SentimentModel()
+    # Match the session fixture's quantization so both instances hit the
+    # keyed pipeline cache instead of paying a second full model load
+    model1 = SentimentModel(quantize=not torch.cuda.is_available())
+    model2 = SentimentModel(quantize=not torch.cuda.is_available())
     
     # Verify instances are different
     assert model1 is not model2
@@ -137,28 +105,28 @@ def test_multiple_model_instances():
 # Sentiment Analysis Tests
 
 @pytest.mark.parametrize("text", POSITIVE_TEST_CASES)
-def test_positive_sentiment(sentiment_model: SentimentModel, text: str):
+def test_positive_sentiment(predictions, text: str):
     """Test that the model correctly identifies positive sentiment."""
-    test_logger.info(f"Testing positive sentiment: {text[:50]}...")
-    result = sentiment_model.analyze(text)
+    test_logger.debug("Testing positive sentiment: %.50s...", text)
+    result = predictions[text]
     assert result["label"] == "POSITIVE"
     assert result["score"] > 0.5
     assert 0 <= result["score"] <= 1.0
 
 @pytest.mark.parametrize("text", NEGATIVE_TEST_CASES)
-def test_negative_sentiment(sentiment_model: SentimentModel, text: str):
+def test_negative_sentiment(predictions, text: str):
     """Test that the model correctly identifies negative sentiment."""
-    test_logger.info(f"Testing negative sentiment: {text[:50]}...")
-    result = sentiment_model.analyze(text)
+    test_logger.debug("Testing negative sentiment: %.50s...", text)
+    result = predictions[text]
     assert result["label"] == "NEGATIVE"
     assert result["score"] > 0.5
     assert 0 <= result["score"] <= 1.0
 
 @pytest.mark.parametrize("text", NEUTRAL_TEST_CASES)
-def test_neutral_sentiment(sentiment_model: SentimentModel, text: str):
+def test_neutral_sentiment(predictions, text: str):
     """Test the model's behavior with neutral statements."""
-    test_logger.info(f"Testing neutral sentiment: {text[:50]}...")
-    result = sentiment_model.analyze(text)
+    test_logger.debug("Testing neutral sentiment: %.50s...", text)
+    result = predictions[text]
     # Model should still classify as either POSITIVE or NEGATIVE
     assert result["label"] in ["POSITIVE", "NEGATIVE"]
     assert 0 <= result["score"] <= 1.0
@@ -166,9 +134,9 @@ def test_neutral_sentiment(sentiment_model: SentimentModel, text: str):
 # Edge Case Tests
 
 @pytest.mark.parametrize("text,expected", SHORT_INPUTS)
-def test_short_inputs(sentiment_model: SentimentModel, text: str, expected: str):
+def test_short_inputs(predictions, text: str, expected: str):
     """Test with very short inputs."""
-    result = sentiment_model.analyze(text)
+    result = predictions[text]
     # For very short inputs, we'll accept either the expected sentiment or the opposite,
     # as the model might have difficulty with very short texts
     if expected == "NEGATIVE" and text == "Meh":
@@ -179,58 +147,48 @@ def test_short_inputs(sentiment_model: SentimentModel, text: str, expected: str)
         assert result["label"] == expected
 
 def test_very_long_input(sentiment_model: SentimentModel):
-    """Test with very long input text (should be automatically truncated)."""
+    """Test with very long input text (truncated by the pipeline config)."""
     # Create a text that's definitely longer than the model's max length
     # but not so long that it causes memory issues (reduced from 200 to 100)
     long_text = "This is a very long text. " * 100  # About 500 words
-    
-    try:
-        # Test that it doesn't raise an exception
-        result = sentiment_model.analyze(long_text)
-        
-        # Basic validation of the result
-        assert isinstance(result, dict), "Result should be a dictionary"
-        assert 'label' in result, "Result should have a 'label' key"
-        assert 'score' in result, "Result should have a 'score' key"
-        assert result["label"] in ["POSITIVE", "NEGATIVE"], \
-            f"Unexpected label: {result['label']}"
-        assert 0 <= result["score"] <= 1.0, \
-            f"Score {result['score']} is not between 0 and 1"
-            
-    except Exception as e:
-        # If we get a sequence length error, the test is skipped
-        if "maximum sequence length" in str(e).lower() or "size of tensor" in str(e):
-            test_logger.warning("Model doesn't support automatic truncation of long sequences")
-            pytest.skip("Model doesn't support automatic truncation of long sequences")
-        else:
-            # Log the unexpected error and re-raise
-            test_logger.error(f"Unexpected error in test_very_long_input: {str(e)}")
-            raise
+
+    # The pipeline is configured with truncation and a max_length cap, so
+    # over-length inputs are truncated rather than raising
+    result = sentiment_model.analyze(long_text)
+
+    assert isinstance(result, dict), "Result should be a dictionary"
+    assert 'label' in result, "Result should have a 'label' key"
+    assert 'score' in result, "Result should have a 'score' key"
+    assert result["label"] in ["POSITIVE", "NEGATIVE"], \
+        f"Unexpected label: {result['label']}"
+    assert 0 <= result["score"] <= 1.0, \
+        f"Score {result['score']} is not between 0 and 1"
 
 # Consistency Tests
 
-def test_sentiment_consistency(sentiment_model: SentimentModel):
+def test_sentiment_consistency(predictions):
     """Test that similar phrases produce consistent results."""
     test_logger.info("Testing sentiment consistency...")
-    similar_phrases = [
-        "This is really good!",
-        "I'm really impressed with this product!",
-        "What a fantastic product!"
-    ]
-    
-    # Get predictions for all phrases
-    predictions = [sentiment_model.analyze(phrase)["label"] for phrase in similar_phrases]
-    
+
+    # The session-wide predictions dict already scored these phrases as part
+    # of the deduplicated union, so this is a pure lookup
+    labels = [predictions[phrase]["label"] for phrase in CONSISTENCY_PHRASES]
+
     # Check consistency (all predictions should be the same)
-    assert len(set(predictions)) == 1, \
-        f"Inconsistent predictions for similar phrases: {dict(zip(similar_phrases, predictions))}"
+    assert len(set(labels)) == 1, \
+        f"Inconsistent predictions for similar phrases: {dict(zip(CONSISTENCY_PHRASES, labels))}"
 
-def test_repeated_inference_consistency(sentiment_model: SentimentModel):
+def test_repeated_inference_consistency():
     """Test that the same input produces consistent results across multiple runs."""
     test_logger.info("Testing repeated inference consistency...")
+    # The shared fixture memoizes analyze() per text, which would make five
+    # calls one forward pass plus four cache hits — vacuously consistent.
+    # Use a cache=False instance (matching the fixture's quantization so the
+    # underlying pipeline is reused) to exercise real repeated inference.
+    model = SentimentModel(cache=False, quantize=not torch.cuda.is_available())
     text = "This is a test of consistency."
-    results = [sentiment_model.analyze(text) for _ in range(5)]
-    
+    results = [model.analyze(text) for _ in range(5)]
+
     # All predictions should be the same
     assert all(r["label"] == results[0]["label"] for r in results), \
         "Inconsistent predictions for the same input"
@@ -239,36 +197,25 @@ def test_repeated_inference_consistency(sentiment_model: SentimentModel):
 
 # Error Handling Tests
 
-def test_error_handling(sentiment_model: SentimentModel):
-    """Test error handling for invalid inputs."""
-    test_logger.info("\n=== Starting error handling tests ===")
-    
-    # Test with empty string
-    test_logger.debug("Testing empty string input")
-    with pytest.raises(ValueError) as exc_info:
-        sentiment_model.analyze("")
-    assert "non-empty" in str(exc_info.value).lower(), \
-        f"Expected error about non-empty string, got: {str(exc_info.value)}"
-    
-    # Test with non-string input (integer)
-    test_logger.debug("Testing non-string input (int)")
-    with pytest.raises(ValueError) as exc_info:
-        sentiment_model.analyze(123)  # type: ignore
-    assert "non-empty" in str(exc_info.value).lower(), \
-        f"Expected error about non-empty string, got: {str(exc_info.value)}"
-    
-    # Test with None input
-    test_logger.debug("Testing None input")
+@pytest.mark.parametrize(
+    "bad_input",
+    ["", None, 123, ["a", "b"]],
+    ids=["empty-string", "none", "int", "list"],
+)
+def test_error_handling(sentiment_model: SentimentModel, bad_input):
+    """Test error handling for invalid inputs.
+
+    Validation happens before the tokenizer is ever invoked, so bad inputs
+    fail fast with a clear message instead of deep inside HF code.
+    """
     with pytest.raises(ValueError) as exc_info:
-        sentiment_model.analyze(None)  # type: ignore
+        sentiment_model.analyze(bad_input)  # type: ignore
     assert "non-empty" in str(exc_info.value).lower(), \
         f"Expected error about non-empty string, got: {str(exc_info.value)}"
-    
-    # Note: We're removing the whitespace-only test since the model might be trimming whitespace
-    # before validation, which is a common and acceptable behavior
-    
-    test_logger.info("✓ All error handling tests passed")
-    test_logger.info("=== Error handling tests completed ===\n")
+
+    # Note: We're not testing whitespace-only input since the model might be
+    # trimming whitespace before validation, which is a common and acceptable
+    # behavior
 
 # Performance Tests
 
@@ -280,9 +227,12 @@ def test_performance_large_batch(sentiment_model: SentimentModel):
     test_texts = [f"Test text {i}" for i in range(batch_size)]
     
     start_time = time.time()
-    
-    results = [sentiment_model.analyze(text) for text in test_texts]
-    
+
+    # Threads are enough here: torch releases the GIL inside the C++ forward,
+    # so BS=1 calls overlap across cores without spawning processes.
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = list(executor.map(sentiment_model.analyze, test_texts))
+
     elapsed = time.time() - start_time
     avg_time = (elapsed / batch_size) * 1000  # Convert to ms
     